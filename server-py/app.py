@@ -2,9 +2,11 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import os
 import logging
+from typing import Any, Dict, Optional
 from services.fingerprint_processor import FingerprintProcessor
 from services.matcher import FingerprintMatcher
 from utils.digitalpersona import DigitalPersonaInterface
+from utils.json_provider import OrjsonProvider, ORJSON_AVAILABLE
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -12,6 +14,8 @@ logger = logging.getLogger(__name__)
 
 # Initialize Flask app
 app = Flask(__name__)
+if ORJSON_AVAILABLE:
+    app.json = OrjsonProvider(app)
 CORS(app, origins=['http://localhost:3000', 'http://localhost:8000'])
 
 # Initialize services
@@ -19,6 +23,42 @@ fingerprint_processor = FingerprintProcessor()
 fingerprint_matcher = FingerprintMatcher()
 dp_interface = DigitalPersonaInterface()
 
+# Initialize DigitalPersona interface
+if dp_interface.initialize():
+    logger.info("DigitalPersona interface initialized successfully")
+else:
+    logger.warning("Failed to initialize DigitalPersona interface - scanner may not be available")
+
+def warmup_kernels() -> None:
+    """
+    Compile the fingerprint kernels before the first request
+    
+    Must run in the process that serves requests: under gunicorn it is
+    called from the post_worker_init hook, never in the preloading master,
+    so Numba state is not created before workers are forked.
+    """
+    fingerprint_processor.warmup()
+    fingerprint_matcher.warmup()
+
+def parse_json() -> Optional[Dict[str, Any]]:
+    """
+    Parse the request body as a JSON object
+    
+    Reads the raw body without caching it on the request and decodes it with
+    the app's JSON provider (orjson when available). Returns None when the
+    body is empty, not valid JSON, or not an object.
+    """
+    body = request.get_data(cache=False)
+    if not body:
+        return None
+    
+    try:
+        data = app.json.loads(body)
+    except ValueError:
+        return None
+    
+    return data if isinstance(data, dict) else None
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -75,7 +115,7 @@ def capture_fingerprint():
 def match_fingerprint():
     """Match fingerprint template against a list of templates"""
     try:
-        data = request.get_json()
+        data = parse_json()
         
         if not data:
             return jsonify({
@@ -117,7 +157,7 @@ def match_fingerprint():
 def verify_quality():
     """Verify the quality of a fingerprint template"""
     try:
-        data = request.get_json()
+        data = parse_json()
         
         if not data:
             return jsonify({
@@ -153,7 +193,7 @@ def verify_quality():
 def extract_features():
     """Extract features from a fingerprint template"""
     try:
-        data = request.get_json()
+        data = parse_json()
         
         if not data:
             return jsonify({
@@ -218,16 +258,13 @@ def internal_error(error):
     }), 500
 
 if __name__ == '__main__':
+    # Development and Windows server; POSIX production runs under gunicorn (see gunicorn.conf.py)
+    warmup_kernels()
+    
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV') == 'development'
     
     logger.info(f"Starting fingerprint processing service on port {port}")
     logger.info(f"Debug mode: {debug}")
     
-    # Initialize DigitalPersona interface
-    if dp_interface.initialize():
-        logger.info("DigitalPersona interface initialized successfully")
-    else:
-        logger.warning("Failed to initialize DigitalPersona interface - scanner may not be available")
-    
     app.run(host='0.0.0.0', port=port, debug=debug)
@@ -1,5 +1,5 @@
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Final
 
 class Config:
     """Configuration class for the fingerprint processing service"""
@@ -31,6 +31,7 @@ class Config:
     CAPTURE_TIMEOUT = int(os.environ.get('CAPTURE_TIMEOUT', 30))
     MAX_RETRIES = int(os.environ.get('MAX_RETRIES', 3))
     SCANNER_POLL_INTERVAL = float(os.environ.get('SCANNER_POLL_INTERVAL', 0.1))
+    SIMULATED_CAPTURE_DELAY = float(os.environ.get('SIMULATED_CAPTURE_DELAY', 2))  # seconds, simulation mode only
     
     # Image Processing Configuration
     IMAGE_MAX_SIZE = (512, 512)  # Maximum image dimensions
@@ -38,7 +39,7 @@ class Config:
     SUPPORTED_FORMATS = ['PNG', 'JPEG', 'BMP', 'TIFF']
     
     # Template Configuration
-    TEMPLATE_VERSION = '1.0'
+    TEMPLATE_VERSION = '2.0'
     MAX_MINUTIAE_POINTS = 50
     MIN_MINUTIAE_POINTS = 10
     
@@ -51,6 +52,7 @@ class Config:
     ENABLE_PERFORMANCE_LOGGING = os.environ.get('ENABLE_PERFORMANCE_LOGGING', 'true').lower() == 'true'
     CACHE_ENABLED = os.environ.get('CACHE_ENABLED', 'false').lower() == 'true'
     CACHE_TTL = int(os.environ.get('CACHE_TTL', 300))  # 5 minutes
+    MATCHER_THREADS = int(os.environ.get('MATCHER_THREADS', os.cpu_count() or 1))  # matcher pool size per process
     
     # Security Configuration
     RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
@@ -131,6 +133,12 @@ class Config:
         if cls.API_TIMEOUT <= 0:
             errors.append("API_TIMEOUT must be positive")
         
+        if cls.SIMULATED_CAPTURE_DELAY < 0:
+            errors.append("SIMULATED_CAPTURE_DELAY must not be negative")
+        
+        if cls.MATCHER_THREADS <= 0:
+            errors.append("MATCHER_THREADS must be positive")
+        
         # Validate minutiae limits
         if cls.MIN_MINUTIAE_POINTS <= 0:
             errors.append("MIN_MINUTIAE_POINTS must be positive")
@@ -204,3 +212,14 @@ def get_config(env: str = None) -> Config:
 
 # Export current configuration
 current_config = get_config()
+
+# Validated values used by the processing and matching services, resolved once at import
+MIN_QUALITY_THRESHOLD: Final[float] = current_config.MIN_QUALITY_THRESHOLD
+MATCH_THRESHOLD: Final[float] = current_config.MATCH_THRESHOLD
+MAX_DISTANCE_THRESHOLD: Final[int] = current_config.MAX_DISTANCE_THRESHOLD
+ORIENTATION_TOLERANCE: Final[float] = current_config.ORIENTATION_TOLERANCE
+MIN_MINUTIAE_POINTS: Final[int] = current_config.MIN_MINUTIAE_POINTS
+MAX_MINUTIAE_POINTS: Final[int] = current_config.MAX_MINUTIAE_POINTS
+SIMULATED_CAPTURE_DELAY: Final[float] = current_config.SIMULATED_CAPTURE_DELAY
+MATCHER_THREADS: Final[int] = current_config.MATCHER_THREADS
+TEMPLATE_VERSION: Final[str] = current_config.TEMPLATE_VERSION
@@ -0,0 +1,33 @@
+import os
+import multiprocessing
+
+# Gunicorn configuration for the fingerprint processing service
+# Usage: gunicorn -c gunicorn.conf.py app:app
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', 5000)}"
+
+# Threaded workers; OpenCV and the Numba kernels release the GIL while running.
+# One worker per core: the request threads mostly wait on the scanner. The
+# matcher pool gets the cores left per worker, so with the default worker count
+# it has one thread and matching runs inline on the request thread
+worker_class = 'gthread'
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+os.environ.setdefault('MATCHER_THREADS', str(max(1, multiprocessing.cpu_count() // workers)))
+
+# Import the app once in the master and share it with workers via fork.
+# The Numba kernels are compiled per worker in post_worker_init instead, so
+# no Numba state exists in the master when it forks
+preload_app = True
+
+# Fingerprint capture blocks on the scanner for up to CAPTURE_TIMEOUT seconds
+timeout = int(os.environ.get('CAPTURE_TIMEOUT', 30)) + 30
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('LOG_LEVEL', 'info').lower()
+
+def post_worker_init(worker):
+    """Compile the fingerprint kernels in each worker after it has been forked"""
+    from app import warmup_kernels
+    warmup_kernels()
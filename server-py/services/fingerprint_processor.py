@@ -1,20 +1,240 @@
 import cv2
 import numpy as np
-import base64
-import json
+import binascii
 import logging
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, Mapping, Optional
+from config.config import MIN_QUALITY_THRESHOLD, MIN_MINUTIAE_POINTS, MAX_MINUTIAE_POINTS
+from utils.jit import njit, NUMBA_AVAILABLE
+from utils.template_codec import encode_template, decode_template
 
 logger = logging.getLogger(__name__)
 
+# cv2.hasNonZero (OpenCV >= 4.9) stops at the first foreground pixel instead of counting them all
+_has_non_zero = getattr(cv2, 'hasNonZero', None) or (lambda image: cv2.countNonZero(image) > 0)
+
+# The kernels are serial: requests already run them concurrently on gthread
+# workers and in the matcher pool, and a parallel=True kernel called from
+# several threads at once aborts the process under Numba's workqueue layer
+@njit(cache=True, nogil=True)
+def _zhang_suen(img):
+    """
+    Zhang-Suen thinning of a contiguous binary uint8 image (non-zero = ridge)
+    
+    Each sweep runs the two Zhang-Suen sub-iterations; candidate pixels are
+    marked in a companion mask and deleted after the sub-iteration, so every
+    pixel sees the same neighbourhood. Terminates once a full sweep removes
+    nothing.
+    """
+    h, w = img.shape
+    skel = np.zeros((h, w), np.uint8)
+    for i in range(h):
+        for j in range(w):
+            if img[i, j] != 0:
+                skel[i, j] = 1
+    marks = np.zeros((h, w), np.uint8)
+    
+    changed = 1
+    while changed > 0:
+        changed = 0
+        for step in range(2):
+            removed = 0
+            for i in range(1, h - 1):
+                for j in range(1, w - 1):
+                    marks[i, j] = 0
+                    if skel[i, j] == 0:
+                        continue
+                    
+                    # Neighbours P2..P9, clockwise from north
+                    p2 = np.int32(skel[i - 1, j])
+                    p3 = np.int32(skel[i - 1, j + 1])
+                    p4 = np.int32(skel[i, j + 1])
+                    p5 = np.int32(skel[i + 1, j + 1])
+                    p6 = np.int32(skel[i + 1, j])
+                    p7 = np.int32(skel[i + 1, j - 1])
+                    p8 = np.int32(skel[i, j - 1])
+                    p9 = np.int32(skel[i - 1, j - 1])
+                    
+                    # B(P): number of foreground neighbours
+                    b = p2 + p3 + p4 + p5 + p6 + p7 + p8 + p9
+                    if b < 2 or b > 6:
+                        continue
+                    
+                    # A(P): number of 0 -> 1 transitions in the sequence P2..P9, P2
+                    a = ((p2 == 0 and p3 == 1) + (p3 == 0 and p4 == 1) +
+                         (p4 == 0 and p5 == 1) + (p5 == 0 and p6 == 1) +
+                         (p6 == 0 and p7 == 1) + (p7 == 0 and p8 == 1) +
+                         (p8 == 0 and p9 == 1) + (p9 == 0 and p2 == 1))
+                    if a != 1:
+                        continue
+                    
+                    if step == 0:
+                        if p2 * p4 * p6 != 0 or p4 * p6 * p8 != 0:
+                            continue
+                    else:
+                        if p2 * p4 * p8 != 0 or p2 * p6 * p8 != 0:
+                            continue
+                    
+                    marks[i, j] = 1
+                    removed += 1
+            
+            if removed > 0:
+                for i in range(1, h - 1):
+                    for j in range(1, w - 1):
+                        if marks[i, j] != 0:
+                            skel[i, j] = 0
+            changed += removed
+    
+    for i in range(h):
+        for j in range(w):
+            if skel[i, j] != 0:
+                skel[i, j] = 255
+    return skel
+
+@njit(cache=True, nogil=True)
+def _orient_batch(gx, gy, xs, ys, hw):
+    """
+    Orientation at each (xs[i], ys[i]) from precomputed Sobel gradients
+    
+    Averages gx/gy over a (2*hw+1) square window clipped to the image and
+    returns atan2(mean_gy, mean_gx) per point.
+    """
+    h, w = gx.shape
+    n = xs.shape[0]
+    out = np.zeros(n, np.float32)
+    for k in range(n):
+        x1 = max(0, xs[k] - hw)
+        x2 = min(w, xs[k] + hw + 1)
+        y1 = max(0, ys[k] - hw)
+        y2 = min(h, ys[k] + hw + 1)
+        count = (x2 - x1) * (y2 - y1)
+        if count <= 0:
+            continue
+        sx = 0.0
+        sy = 0.0
+        for y in range(y1, y2):
+            for x in range(x1, x2):
+                sx += gx[y, x]
+                sy += gy[y, x]
+        out[k] = np.arctan2(sy / count, sx / count)
+    return out
+
+@njit(cache=True, nogil=True)
+def _quality_stats(img):
+    """
+    Single pass over a uint8 image returning (std, laplacian_var)
+    
+    The Laplacian is the 4-neighbour kernel used by cv2.Laplacian(ksize=1),
+    with the same reflected (BORDER_REFLECT_101) neighbours at the image
+    border, so both statistics match np.std and cv2.Laplacian(...).var().
+    """
+    h, w = img.shape
+    s = 0.0
+    s2 = 0.0
+    l_sum = 0.0
+    l_sum2 = 0.0
+    for i in range(h):
+        i_up = i - 1 if i > 0 else min(1, h - 1)
+        i_down = i + 1 if i < h - 1 else max(h - 2, 0)
+        for j in range(w):
+            j_left = j - 1 if j > 0 else min(1, w - 1)
+            j_right = j + 1 if j < w - 1 else max(w - 2, 0)
+            
+            p = np.float64(img[i, j])
+            s += p
+            s2 += p * p
+            
+            up = np.float64(img[i_up, j])
+            down = np.float64(img[i_down, j])
+            left = np.float64(img[i, j_left])
+            right = np.float64(img[i, j_right])
+            lap = up + down + left + right - 4.0 * p
+            l_sum += lap
+            l_sum2 += lap * lap
+    
+    n = h * w
+    mean = s / n
+    std = np.sqrt(max(s2 / n - mean * mean, 0.0))
+    
+    l_mean = l_sum / n
+    laplacian_var = max(l_sum2 / n - l_mean * l_mean, 0.0)
+    return std, laplacian_var
+
+@njit(cache=True, nogil=True)
+def _crossing_numbers(skel):
+    """
+    Crossing-number minutiae scan over a uint8 skeleton (non-zero = ridge)
+    
+    Counts, per ridge pixel, the 0 -> 1 transitions around its clockwise
+    8-neighbourhood. Rows are scanned twice: once to count minutiae
+    (CN 1 = ending, CN 3 = bifurcation) and once to fill the output arrays
+    at each row's offset.
+    
+    Returns:
+        Tuple of (xs, ys, crossing_numbers) arrays in row-major order
+    """
+    h, w = skel.shape
+    cn = np.zeros((h, w), np.uint8)
+    counts = np.zeros(h, np.int64)
+    
+    for i in range(1, h - 1):
+        c = 0
+        for j in range(1, w - 1):
+            if skel[i, j] == 0:
+                continue
+            
+            p1 = np.int32(skel[i - 1, j] != 0)
+            p2 = np.int32(skel[i - 1, j + 1] != 0)
+            p3 = np.int32(skel[i, j + 1] != 0)
+            p4 = np.int32(skel[i + 1, j + 1] != 0)
+            p5 = np.int32(skel[i + 1, j] != 0)
+            p6 = np.int32(skel[i + 1, j - 1] != 0)
+            p7 = np.int32(skel[i, j - 1] != 0)
+            p8 = np.int32(skel[i - 1, j - 1] != 0)
+            
+            n = (abs(p1 - p2) + abs(p2 - p3) + abs(p3 - p4) + abs(p4 - p5) +
+                 abs(p5 - p6) + abs(p6 - p7) + abs(p7 - p8) + abs(p8 - p1)) // 2
+            if n == 1 or n == 3:
+                cn[i, j] = n
+                c += 1
+        counts[i] = c
+    
+    offsets = np.cumsum(counts) - counts
+    total = counts.sum()
+    xs = np.empty(total, np.int32)
+    ys = np.empty(total, np.int32)
+    crossings = np.empty(total, np.uint8)
+    
+    for i in range(1, h - 1):
+        k = offsets[i]
+        for j in range(1, w - 1):
+            if cn[i, j] != 0:
+                xs[k] = j
+                ys[k] = i
+                crossings[k] = cn[i, j]
+                k += 1
+    return xs, ys, crossings
+
 class FingerprintProcessor:
     """
     Handles fingerprint image processing and template generation
     """
     
     def __init__(self):
-        self.min_quality_threshold = 0.6
-        self.template_version = "1.0"
+        self.min_quality_threshold = MIN_QUALITY_THRESHOLD
+        self.min_minutiae_points = MIN_MINUTIAE_POINTS
+        self.max_minutiae_points = MAX_MINUTIAE_POINTS
+        self._local = threading.local()  # Per-thread scratch buffers and CLAHE
+        
+        # Structuring elements are read-only and shared by all requests
+        self._ellipse3 = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        self._cross3 = cv2.getStructuringElement(cv2.MORPH_CROSS, (3, 3))
+        
+        # Quality factor weights: minutiae count, contrast, sharpness, ridge clarity
+        self._quality_weights = np.array([0.3, 0.25, 0.25, 0.2], np.float32)
+        
+        # Run the enhancement filters through OpenCV's T-API when an OpenCL device is present
+        self.use_opencl = cv2.ocl.haveOpenCL() and cv2.ocl.useOpenCL()
         
     def process_fingerprint(self, image_data: str) -> Dict[str, Any]:
         """
@@ -27,8 +247,9 @@ class FingerprintProcessor:
             Dictionary containing success status, template, and quality score
         """
         try:
-            # Decode base64 image
-            image_bytes = base64.b64decode(image_data)
+            # Decode base64 image (a2b_base64 reads ASCII str directly, without
+            # the intermediate bytes copy made by base64.b64decode)
+            image_bytes = binascii.a2b_base64(image_data)
             nparr = np.frombuffer(image_bytes, np.uint8)
             image = cv2.imdecode(nparr, cv2.IMREAD_GRAYSCALE)
             
@@ -41,8 +262,11 @@ class FingerprintProcessor:
             # Enhance image quality
             enhanced_image = self._enhance_fingerprint(image)
             
+            # Compute gradients once for orientation and quality estimation
+            gx, gy = self._compute_gradients(enhanced_image)
+            
             # Extract minutiae points
-            minutiae = self._extract_minutiae(enhanced_image)
+            minutiae = self._extract_minutiae(enhanced_image, gx, gy)
             
             if not minutiae:
                 return {
@@ -53,10 +277,11 @@ class FingerprintProcessor:
             # Calculate quality score
             quality = self._calculate_quality(enhanced_image, minutiae)
             
-            if quality < self.min_quality_threshold:
+            min_quality = self.min_quality_threshold
+            if quality < min_quality:
                 return {
                     'success': False,
-                    'error': f'Fingerprint quality too low: {quality:.2f} (minimum: {self.min_quality_threshold})'
+                    'error': f'Fingerprint quality too low: {quality:.2f} (minimum: {min_quality})'
                 }
             
             # Generate template
@@ -76,32 +301,94 @@ class FingerprintProcessor:
                 'error': f'Failed to process fingerprint: {str(e)}'
             }
     
+    def warmup(self) -> None:
+        """
+        Compile the Numba kernels for the argument types used at runtime
+        
+        With cache=True the machine code is also written to disk, so later
+        processes load it instead of recompiling.
+        """
+        if not NUMBA_AVAILABLE:
+            return
+        
+        from numba import types
+        image_t = types.uint8[:, ::1]
+        gradient_t = types.float32[:, ::1]
+        coords_t = types.int32[::1]
+        
+        _zhang_suen.compile((image_t,))
+        _orient_batch.compile((gradient_t, gradient_t, coords_t, coords_t, types.int64))
+        _quality_stats.compile((image_t,))
+        _crossing_numbers.compile((image_t,))
+    
     def _enhance_fingerprint(self, image: np.ndarray) -> np.ndarray:
         """
         Enhance fingerprint image quality using various filters
+        
+        With OpenCL available the filter chain runs on cv2.UMat and the result
+        is downloaded once at the end, since the compiled kernels downstream
+        need a host array.
         """
+        src = cv2.UMat(image) if self.use_opencl else image
+        
         # Normalize image
-        image = cv2.normalize(image, None, 0, 255, cv2.NORM_MINMAX)
+        normalized = cv2.normalize(src, None, 0, 255, cv2.NORM_MINMAX)
         
         # Apply Gaussian blur to reduce noise
-        blurred = cv2.GaussianBlur(image, (3, 3), 0)
+        if self.use_opencl:
+            blurred = cv2.GaussianBlur(normalized, (3, 3), 0)
+        else:
+            blurred, _, _ = self._get_buffers(image.shape)
+            cv2.GaussianBlur(normalized, (3, 3), 0, dst=blurred)
         
         # Enhance contrast using CLAHE
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        enhanced = clahe.apply(blurred)
+        enhanced = self._get_clahe().apply(blurred)
         
         # Apply morphological operations to clean up
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
-        enhanced = cv2.morphologyEx(enhanced, cv2.MORPH_CLOSE, kernel)
+        enhanced = cv2.morphologyEx(enhanced, cv2.MORPH_CLOSE, self._ellipse3)
         
-        return enhanced
+        return enhanced.get() if self.use_opencl else enhanced
     
-    def _extract_minutiae(self, image: np.ndarray) -> list:
+    def _get_clahe(self):
+        """
+        Get this thread's CLAHE instance (CLAHE keeps internal buffers, so it is not shared)
+        """
+        clahe = getattr(self._local, 'clahe', None)
+        if clahe is None:
+            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+            self._local.clahe = clahe
+        return clahe
+    
+    def _get_buffers(self, shape: tuple) -> tuple:
+        """
+        Get this thread's (blur, gx, gy) scratch buffers for images of the given shape
+        """
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None or buffers[0].shape != shape:
+            buffers = (
+                np.empty(shape, np.uint8),
+                np.empty(shape, np.float32),
+                np.empty(shape, np.float32)
+            )
+            self._local.buffers = buffers
+        return buffers
+    
+    def _compute_gradients(self, image: np.ndarray) -> tuple:
+        """
+        Compute Sobel x/y gradients of the enhanced image into the scratch buffers
+        """
+        _, gx, gy = self._get_buffers(image.shape)
+        cv2.Sobel(image, cv2.CV_32F, 1, 0, dst=gx, ksize=3)
+        cv2.Sobel(image, cv2.CV_32F, 0, 1, dst=gy, ksize=3)
+        return gx, gy
+    
+    def _extract_minutiae(self, image: np.ndarray, gx: np.ndarray, gy: np.ndarray) -> list:
         """
         Extract minutiae points from fingerprint image
         
-        This is a simplified implementation. In production, you would use
-        a more sophisticated algorithm or a specialized library.
+        Minutiae are found on the ridge skeleton by crossing number: pixels
+        with one 0->1 transition around their 8-neighbourhood are ridge
+        endings, three transitions are bifurcations.
         """
         minutiae = []
         
@@ -112,90 +399,93 @@ class FingerprintProcessor:
             # Skeletonize the image
             skeleton = self._skeletonize(binary)
             
-            # Find contours
-            contours, _ = cv2.findContours(skeleton, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            # Prune short ridge fragments, which only produce spurious endings
+            skeleton = self._prune_skeleton(skeleton)
             
-            # Extract key points from contours
-            for contour in contours:
-                if len(contour) > 10:  # Filter small contours
-                    # Find corner points (simplified minutiae detection)
-                    epsilon = 0.02 * cv2.arcLength(contour, True)
-                    approx = cv2.approxPolyDP(contour, epsilon, True)
-                    
-                    for point in approx:
-                        x, y = point[0]
-                        # Calculate orientation (simplified)
-                        orientation = self._calculate_orientation(skeleton, x, y)
-                        
-                        minutiae.append({
-                            'x': int(x),
-                            'y': int(y),
-                            'orientation': float(orientation),
-                            'type': 'bifurcation'  # Simplified - would need proper classification
-                        })
-            
-            # Limit number of minutiae points
-            minutiae = minutiae[:50]  # Keep top 50 points
+            # Detect ridge endings and bifurcations
+            xs, ys, crossings = self._find_minutiae_points(skeleton)
+            
+            # Limit number of minutiae points, keeping those with the strongest ridge contrast
+            max_points = self.max_minutiae_points
+            if len(xs) > max_points:
+                contrast = np.abs(gx[ys, xs]) + np.abs(gy[ys, xs])
+                keep = np.argsort(-contrast, kind='stable')[:max_points]
+                xs, ys, crossings = xs[keep], ys[keep], crossings[keep]
+            
+            if len(xs):
+                # Calculate orientations for all points from the shared gradients
+                orientations = _orient_batch(gx, gy, xs, ys, 2)
+                
+                for x, y, crossing, orientation in zip(xs, ys, crossings, orientations):
+                    minutiae.append({
+                        'x': int(x),
+                        'y': int(y),
+                        'orientation': float(orientation),
+                        'type': 'ending' if crossing == 1 else 'bifurcation'
+                    })
             
         except Exception as e:
             logger.error(f"Error extracting minutiae: {str(e)}")
         
         return minutiae
     
+    def _prune_skeleton(self, skeleton: np.ndarray, min_length: int = 10) -> np.ndarray:
+        """
+        Remove 8-connected skeleton components of min_length pixels or fewer
+        """
+        _, labels, stats, _ = cv2.connectedComponentsWithStats(skeleton, connectivity=8)
+        keep = stats[:, cv2.CC_STAT_AREA] > min_length
+        keep[0] = False  # Background label
+        return keep[labels].astype(np.uint8) * 255
+    
+    def _find_minutiae_points(self, skeleton: np.ndarray) -> tuple:
+        """
+        Locate crossing-number minutiae on a skeleton
+        
+        Returns:
+            Tuple of (xs, ys, crossing_numbers) arrays
+        """
+        if NUMBA_AVAILABLE:
+            return _crossing_numbers(np.ascontiguousarray(skeleton, dtype=np.uint8))
+        
+        ridge = (skeleton > 0).astype(np.int8)
+        h, w = ridge.shape
+        # Neighbours P1..P8 clockwise from north, for interior pixels
+        ring = [ridge[0:h - 2, 1:w - 1], ridge[0:h - 2, 2:w], ridge[1:h - 1, 2:w], ridge[2:h, 2:w],
+                ridge[2:h, 1:w - 1], ridge[2:h, 0:w - 2], ridge[1:h - 1, 0:w - 2], ridge[0:h - 2, 0:w - 2]]
+        transitions = sum(np.abs(ring[k] - ring[(k + 1) % 8]) for k in range(8)) // 2
+        transitions[ridge[1:h - 1, 1:w - 1] == 0] = 0
+        
+        ys, xs = np.nonzero((transitions == 1) | (transitions == 3))
+        crossings = transitions[ys, xs].astype(np.uint8)
+        return (xs + 1).astype(np.int32), (ys + 1).astype(np.int32), crossings
+    
     def _skeletonize(self, image: np.ndarray) -> np.ndarray:
         """
-        Skeletonize binary image using morphological operations
+        Skeletonize binary image
+        
+        Uses the compiled Zhang-Suen kernel when Numba is available, otherwise
+        falls back to iterative morphological thinning with OpenCV.
         """
+        if NUMBA_AVAILABLE:
+            return _zhang_suen(np.ascontiguousarray(image, dtype=np.uint8))
+        
         skeleton = np.zeros(image.shape, np.uint8)
         eroded = np.copy(image)
         temp = np.zeros(image.shape, np.uint8)
         
-        kernel = cv2.getStructuringElement(cv2.MORPH_CROSS, (3, 3))
-        
         while True:
-            cv2.erode(eroded, kernel, eroded)
-            cv2.dilate(eroded, kernel, temp)
+            cv2.erode(eroded, self._cross3, eroded)
+            cv2.dilate(eroded, self._cross3, temp)
             cv2.subtract(image, temp, temp)
             cv2.bitwise_or(skeleton, temp, skeleton)
             eroded, image = image, eroded
             
-            if cv2.countNonZero(image) == 0:
+            if not _has_non_zero(image):
                 break
                 
         return skeleton
     
-    def _calculate_orientation(self, image: np.ndarray, x: int, y: int, window_size: int = 5) -> float:
-        """
-        Calculate orientation at a given point
-        """
-        try:
-            h, w = image.shape
-            half_window = window_size // 2
-            
-            # Ensure coordinates are within bounds
-            x1 = max(0, x - half_window)
-            x2 = min(w, x + half_window + 1)
-            y1 = max(0, y - half_window)
-            y2 = min(h, y + half_window + 1)
-            
-            # Extract window
-            window = image[y1:y2, x1:x2]
-            
-            if window.size == 0:
-                return 0.0
-            
-            # Calculate gradients
-            gx = cv2.Sobel(window, cv2.CV_64F, 1, 0, ksize=3)
-            gy = cv2.Sobel(window, cv2.CV_64F, 0, 1, ksize=3)
-            
-            # Calculate orientation
-            orientation = np.arctan2(gy.mean(), gx.mean())
-            return float(orientation)
-            
-        except Exception as e:
-            logger.error(f"Error calculating orientation: {str(e)}")
-            return 0.0
-    
     def _calculate_quality(self, image: np.ndarray, minutiae: list) -> float:
         """
         Calculate fingerprint quality score
@@ -208,48 +498,52 @@ class FingerprintProcessor:
             minutiae_score = min(len(minutiae) / 30.0, 1.0)  # Normalize to 30 minutiae
             quality_factors.append(minutiae_score)
             
+            std, laplacian_var, edge_density = self._image_statistics(image)
+            
             # Factor 2: Image contrast
-            contrast = np.std(image) / 255.0
+            contrast = std / 255.0
             quality_factors.append(contrast)
             
             # Factor 3: Image sharpness (Laplacian variance)
-            laplacian_var = cv2.Laplacian(image, cv2.CV_64F).var()
             sharpness_score = min(laplacian_var / 1000.0, 1.0)  # Normalize
             quality_factors.append(sharpness_score)
             
             # Factor 4: Ridge clarity (simplified)
-            edges = cv2.Canny(image, 50, 150)
-            edge_density = np.sum(edges > 0) / edges.size
             quality_factors.append(edge_density)
             
             # Calculate weighted average
-            weights = [0.3, 0.25, 0.25, 0.2]
-            quality = sum(factor * weight for factor, weight in zip(quality_factors, weights))
+            quality = np.dot(np.asarray(quality_factors, dtype=np.float32), self._quality_weights)
             
-            return min(max(quality, 0.0), 1.0)  # Clamp between 0 and 1
+            return float(np.clip(quality, 0.0, 1.0))  # Clamp between 0 and 1
             
         except Exception as e:
             logger.error(f"Error calculating quality: {str(e)}")
             return 0.0
     
+    def _image_statistics(self, image: np.ndarray) -> tuple:
+        """
+        Compute intensity std, Laplacian variance and edge density of an image
+        
+        Std and Laplacian variance come from the fused single-pass kernel when
+        Numba is available, otherwise from NumPy/OpenCV passes. Edge density
+        is always the cv2.Canny(50, 150) edge fraction the quality weights were
+        tuned for: a plain gradient threshold has no non-maximum suppression
+        or hysteresis and counts several times as many pixels.
+        """
+        if NUMBA_AVAILABLE:
+            std, laplacian_var = _quality_stats(np.ascontiguousarray(image, dtype=np.uint8))
+        else:
+            std = float(np.std(image))
+            laplacian_var = float(cv2.Laplacian(image, cv2.CV_64F).var())
+        
+        edge_density = cv2.countNonZero(cv2.Canny(image, 50, 150)) / image.size
+        return std, laplacian_var, edge_density
+    
     def _generate_template(self, minutiae: list, quality: float, image_shape: tuple) -> str:
         """
         Generate fingerprint template from minutiae points
         """
-        template_data = {
-            'version': self.template_version,
-            'quality': quality,
-            'image_shape': image_shape,
-            'minutiae': minutiae,
-            'minutiae_count': len(minutiae),
-            'created_at': None  # Will be set by timestamp if needed
-        }
-        
-        # Convert to JSON and encode
-        template_json = json.dumps(template_data, separators=(',', ':'))
-        template_encoded = base64.b64encode(template_json.encode()).decode()
-        
-        return template_encoded
+        return encode_template(minutiae, quality, image_shape)
     
     def verify_quality(self, template: str) -> Dict[str, Any]:
         """
@@ -270,7 +564,7 @@ class FingerprintProcessor:
             
             is_valid = (
                 quality >= self.min_quality_threshold and
-                minutiae_count >= 10  # Minimum number of minutiae
+                minutiae_count >= self.min_minutiae_points
             )
             
             return {
@@ -299,7 +593,7 @@ class FingerprintProcessor:
                     'error': 'Invalid template format'
                 }
             
-            minutiae = template_data.get('minutiae', [])
+            minutiae = template_data['minutiae']
             
             # Calculate feature statistics
             features = {
@@ -308,7 +602,7 @@ class FingerprintProcessor:
                 'image_width': template_data.get('image_shape', [0, 0])[1],
                 'image_height': template_data.get('image_shape', [0, 0])[0],
                 'minutiae_density': len(minutiae) / max(1, template_data.get('image_shape', [1, 1])[0] * template_data.get('image_shape', [1, 1])[1]) * 10000,
-                'average_orientation': np.mean([m.get('orientation', 0) for m in minutiae]) if minutiae else 0,
+                'average_orientation': float(template_data['orientations'].mean(dtype=np.float64)) if len(minutiae) else 0,
                 'version': template_data.get('version', 'unknown')
             }
             
@@ -324,14 +618,8 @@ class FingerprintProcessor:
                 'error': f'Failed to extract features: {str(e)}'
             }
     
-    def _decode_template(self, template: str) -> Optional[Dict[str, Any]]:
+    def _decode_template(self, template: str) -> Optional[Mapping[str, Any]]:
         """
         Decode a fingerprint template
         """
-        try:
-            template_json = base64.b64decode(template).decode()
-            template_data = json.loads(template_json)
-            return template_data
-        except Exception as e:
-            logger.error(f"Error decoding template: {str(e)}")
-            return None
+        return decode_template(template)
@@ -1,21 +1,150 @@
 import numpy as np
-import json
-import base64
 import logging
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from operator import itemgetter
+from typing import Dict, Any, List, Mapping, Optional
+from utils.jit import njit, NUMBA_AVAILABLE
+from config.config import MATCH_THRESHOLD, MAX_DISTANCE_THRESHOLD, ORIENTATION_TOLERANCE, MATCHER_THREADS
+from utils.template_codec import decode_template, hamming_distances, knn_descriptor
 
 logger = logging.getLogger(__name__)
 
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+# Assignment cost of a pair outside the distance or orientation tolerance
+UNMATCHED_COST = 1e9
+
+# Tolerance slack when bounding candidate confidences (keeps the bound safe against rounding)
+BOUND_SLACK = 1e-3
+
+@njit(cache=True, nogil=True, fastmath=True)
+def _nb_find_correspondences(p1, p2, o1, o2, max_d, tol):
+    """
+    Greedy one-to-one minutiae correspondence search
+    
+    In input order, each minutia in p1 takes the unused minutia in p2 with
+    the lowest distance + 20 * orientation difference, among pairs within
+    max_d and tol. Returns a (K, 4) array of (i, j, distance, orientation_diff).
+    
+    Only the fallback for when scipy is missing: with scipy installed every
+    non-empty decoded template carries a KD-tree and the optimal assignment
+    is used instead.
+    """
+    n1 = p1.shape[0]
+    n2 = p2.shape[0]
+    out = np.empty((min(n1, n2), 4))
+    used = np.zeros(n2, np.bool_)
+    max_d2 = max_d * max_d
+    k = 0
+    
+    for i in range(n1):
+        best_j = -1
+        best_score = 0.0
+        best_d = 0.0
+        best_o = 0.0
+        for j in range(n2):
+            if used[j]:
+                continue
+            
+            dx = p1[i, 0] - p2[j, 0]
+            dy = p1[i, 1] - p2[j, 1]
+            d2 = dx * dx + dy * dy
+            if d2 > max_d2:
+                continue
+            
+            od = abs((o1[i] - o2[j] + np.pi) % (2 * np.pi) - np.pi)
+            if od > tol:
+                continue
+            
+            d = np.sqrt(d2)
+            score = d + od * 20
+            if best_j < 0 or score < best_score:
+                best_j = j
+                best_score = score
+                best_d = d
+                best_o = od
+        
+        if best_j >= 0:
+            used[best_j] = True
+            out[k, 0] = i
+            out[k, 1] = best_j
+            out[k, 2] = best_d
+            out[k, 3] = best_o
+            k += 1
+    
+    return out[:k]
+
+@njit(cache=True, nogil=True)
+def _nb_descriptor_distance(query, descriptor, inv_max_d, inv_tol):
+    """
+    Mean over query minutiae of the lowest k-NN descriptor cost against any stored minutia
+    
+    See FingerprintMatcher._descriptor_distance. A stored minutia is
+    abandoned as soon as its running cost reaches the best so far.
+    """
+    nq = query.shape[0]
+    nd = descriptor.shape[0]
+    k = query.shape[1]
+    total = 0.0
+    
+    for i in range(nq):
+        best = 2.0 * k
+        for j in range(nd):
+            cost = 0.0
+            for n in range(k):
+                o = abs(query[i, n, 1] - descriptor[j, n, 1])
+                if o > np.pi:
+                    o = 2 * np.pi - o
+                c = abs(query[i, n, 0] - descriptor[j, n, 0]) * inv_max_d + o * inv_tol
+                # Missing neighbours (NaN) cost the cap as well
+                if not c < 2.0:
+                    c = 2.0
+                cost += c
+                if cost >= best:
+                    break
+            if cost < best:
+                best = cost
+        total += best / k
+    return total / nq
+
 class FingerprintMatcher:
     """
     Handles fingerprint template matching and verification
     """
     
     def __init__(self):
-        self.match_threshold = 0.7
-        self.max_distance_threshold = 50  # Maximum distance between minutiae points
-        self.orientation_tolerance = 0.5  # Tolerance for orientation matching (radians)
+        self.match_threshold = MATCH_THRESHOLD
+        self.max_distance_threshold = MAX_DISTANCE_THRESHOLD  # Maximum distance between minutiae points
+        self.orientation_tolerance = ORIENTATION_TOLERANCE  # Tolerance for orientation matching (radians)
+        self.prefilter_top_k = 50  # Candidates kept by the prefilter for full matching
+        self.prefilter_shortlist = 2 * self.prefilter_top_k  # Closest coarse hashes re-ranked by k-NN descriptor
+        self.parallel_decode_threshold = 32  # Gallery size above which templates are decoded in the pool
+        self.parallel_match_threshold = 8  # Candidates above which full matching runs in the pool
+        self.centroid_gate = 2 * self.max_distance_threshold  # Maximum centroid offset for a stored template to be compared
+        self._inv_max_distance = 1.0 / self.max_distance_threshold
+        self._max_distance_sq = float(self.max_distance_threshold) ** 2
+        self._inv_orientation_tolerance = 1.0 / self.orientation_tolerance
+        self._pool_threads = MATCHER_THREADS
+        # A one-thread pool only adds handoff cost, so work then runs inline
+        self._pool = ThreadPoolExecutor(max_workers=MATCHER_THREADS, thread_name_prefix='matcher') if MATCHER_THREADS > 1 else None
+        
+    def warmup(self) -> None:
+        """
+        Compile the Numba matching kernels for the argument types used at runtime
+        """
+        if not NUMBA_AVAILABLE:
+            return
         
+        from numba import types
+        points_t = types.float32[:, ::1]
+        angles_t = types.float32[::1]
+        _nb_find_correspondences.compile((points_t, points_t, angles_t, angles_t, types.float64, types.float64))
+        _nb_descriptor_distance.compile((types.float32[:, :, ::1], types.float32[:, :, ::1], types.float64, types.float64))
+    
     def match_fingerprint(self, input_template: str, templates: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """
         Match input fingerprint template against a list of stored templates
@@ -34,43 +163,77 @@ class FingerprintMatcher:
                 logger.error("Failed to decode input template")
                 return None
                 
-            input_minutiae = input_data.get('minutiae', [])
-            if not input_minutiae:
+            input_minutiae = input_data['minutiae']
+            if len(input_minutiae) == 0:
                 logger.error("No minutiae found in input template")
                 return None
             
+            # Decode stored templates, in parallel for large galleries
+            if self._pool is not None and len(templates) >= self.parallel_decode_threshold:
+                decoded = self._pool.map(self._decode_candidate, templates)
+            else:
+                decoded = map(self._decode_candidate, templates)
+            candidates = [candidate for candidate in decoded if candidate is not None]
+            
+            # Discard obvious non-matches by coarse hash and k-NN descriptor before full matching
+            if len(candidates) > self.prefilter_top_k:
+                candidates = self._prefilter_candidates(input_template, input_data['coarse_hash'], candidates)
+            
             best_match = None
             best_confidence = 0.0
+            best_index = len(candidates)
+            input_centroid = input_data['centroid']
+            upper_bounds = self._candidate_upper_bounds(input_data, candidates)
+            
+            # Skip templates that cannot reach the threshold or whose minutiae
+            # are centred far from the input's
+            eligible = []
+            for index, ((student_id, stored_data, _), upper_bound) in enumerate(zip(candidates, upper_bounds)):
+                offset = stored_data['centroid'] - input_centroid
+                if (upper_bound >= self.match_threshold and
+                        offset[0] * offset[0] + offset[1] * offset[1] <= self.centroid_gate * self.centroid_gate):
+                    eligible.append((index, student_id, stored_data, upper_bound))
+            
+            # Highest upper bounds first (the sort is stable, so equal bounds keep
+            # gallery order); a strong early match then rules out the rest
+            eligible.sort(key=itemgetter(3), reverse=True)
+            
+            # Input arrays are bound once for all candidates
+            match_input = partial(self._calculate_match_confidence_arrays,
+                                  input_data['points'], input_data['orientations'], tree1=input_data['tree'])
+            score = lambda candidate: match_input(candidate[2]['points'], candidate[2]['orientations'],
+                                                  tree2=candidate[2]['tree'])
+            
+            # Large candidate sets are matched a pool-sized batch at a time
+            if self._pool is not None and len(eligible) >= self.parallel_match_threshold:
+                batch_size = self._pool_threads
+            else:
+                batch_size = 1
             
-            # Compare against each stored template
-            for template_info in templates:
-                student_id = template_info.get('studentId')
-                stored_template = template_info.get('template')
+            # Compare against each remaining stored template
+            for start in range(0, len(eligible), batch_size):
+                if eligible[start][3] < best_confidence:
+                    # Bounds are descending, so no remaining template can beat the best
+                    break
                 
-                if not student_id or not stored_template:
-                    continue
+                # Ties go to the earlier gallery entry, as in a scan in gallery order
+                batch = [candidate for candidate in eligible[start:start + batch_size]
+                         if candidate[3] > best_confidence or (candidate[3] == best_confidence and candidate[0] < best_index)]
+                confidences = self._pool.map(score, batch) if batch_size > 1 else map(score, batch)
                 
-                # Decode stored template
-                stored_data = self._decode_template(stored_template)
-                if not stored_data:
-                    continue
+                for (index, student_id, _, _), confidence in zip(batch, confidences):
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Match confidence for student %s: %.3f", student_id, confidence)
                     
-                stored_minutiae = stored_data.get('minutiae', [])
-                if not stored_minutiae:
-                    continue
-                
-                # Calculate match confidence
-                confidence = self._calculate_match_confidence(input_minutiae, stored_minutiae)
-                
-                logger.info(f"Match confidence for student {student_id}: {confidence:.3f}")
-                
-                # Update best match if this one is better
-                if confidence > best_confidence and confidence >= self.match_threshold:
-                    best_confidence = confidence
-                    best_match = {
-                        'studentId': student_id,
-                        'confidence': confidence
-                    }
+                    # Update best match if this one is better
+                    if confidence >= self.match_threshold and (
+                            confidence > best_confidence or (confidence == best_confidence and index < best_index)):
+                        best_confidence = confidence
+                        best_index = index
+                        best_match = {
+                            'studentId': student_id,
+                            'confidence': confidence
+                        }
             
             if best_match:
                 logger.info(f"Best match found: Student {best_match['studentId']} with confidence {best_match['confidence']:.3f}")
@@ -83,7 +246,148 @@ class FingerprintMatcher:
             logger.error(f"Error during fingerprint matching: {str(e)}")
             return None
     
-    def _calculate_match_confidence(self, minutiae1: List[Dict], minutiae2: List[Dict]) -> float:
+    def _decode_candidate(self, template_info: Dict[str, Any]) -> Optional[tuple]:
+        """
+        Decode one gallery entry into a (studentId, decoded template, template) tuple
+        
+        Returns None for entries without a student id, an undecodable
+        template, or a template with no minutiae.
+        """
+        student_id = template_info.get('studentId')
+        stored_template = template_info.get('template')
+        
+        if not student_id or not stored_template:
+            return None
+        
+        stored_data = self._decode_template(stored_template)
+        if not stored_data or len(stored_data['minutiae']) == 0:
+            return None
+        
+        return student_id, stored_data, stored_template
+    
+    def _prefilter_candidates(self, input_template: str, query_hash: np.ndarray, candidates: List[tuple]) -> List[tuple]:
+        """
+        Keep the prefilter_top_k candidates most similar to the query
+        
+        The prefilter_shortlist candidates with the closest coarse hash are
+        re-ranked by rotation-invariant k-NN descriptor distance. Only the
+        choice of candidates depends on the descriptor; their confidence is
+        still computed by full matching.
+        
+        Args:
+            input_template: Base64 encoded input template
+            query_hash: Coarse hash of the input template
+            candidates: List of (studentId, decoded template, template) tuples
+            
+        Returns:
+            Candidates ordered by increasing descriptor distance
+        """
+        hashes = np.stack([data['coarse_hash'] for _, data, _ in candidates])
+        distances = hamming_distances(query_hash, hashes)
+        shortlist = [candidates[i] for i in np.argsort(distances, kind='stable')[:self.prefilter_shortlist]]
+        if len(shortlist) <= self.prefilter_top_k:
+            return shortlist
+        
+        query = knn_descriptor(input_template)
+        descriptor_distances = np.array([self._descriptor_distance(query, knn_descriptor(template))
+                                         for _, _, template in shortlist])
+        keep = np.argsort(descriptor_distances, kind='stable')[:self.prefilter_top_k]
+        return [shortlist[i] for i in keep]
+    
+    def _descriptor_distance(self, query: np.ndarray, descriptor: np.ndarray) -> float:
+        """
+        Dissimilarity between two k-NN descriptors (0 = identical)
+        
+        Each query minutia is paired with the stored minutia whose neighbours
+        differ least, neighbour by neighbour in distance order. A neighbour's
+        cost is its distance difference over max_distance_threshold plus its
+        relative orientation difference over orientation_tolerance, capped
+        at 2 (also the cost of a missing neighbour).
+        
+        Returns:
+            Mean cost per neighbour over the query minutiae
+        """
+        if len(query) == 0 or len(descriptor) == 0:
+            return np.inf
+        
+        if NUMBA_AVAILABLE:
+            return _nb_descriptor_distance(query, descriptor, self._inv_max_distance, self._inv_orientation_tolerance)
+        
+        # Relative orientations are in [-π, π), so their difference wraps once at most
+        diff = np.abs(query[:, None, :, :] - descriptor[None, :, :, :])
+        orientation_diffs = np.minimum(diff[..., 1], 2 * np.pi - diff[..., 1])
+        costs = diff[..., 0] * self._inv_max_distance + orientation_diffs * self._inv_orientation_tolerance
+        costs = np.nan_to_num(np.minimum(costs, 2.0), nan=2.0)
+        return float(costs.mean(axis=2).min(axis=1).mean())
+    
+    def _candidate_upper_bounds(self, input_data: Mapping[str, Any], candidates: List[tuple]) -> np.ndarray:
+        """
+        Upper bound on the match confidence of every candidate, in one batch
+        
+        Stacks the candidates' points and orientations, padded to the largest
+        template, and tests every stored/input minutia pair against the
+        distance and orientation tolerances in a single broadcast. A minutia
+        without any pair inside both tolerances cannot be matched, so the
+        smaller of the two matchable counts bounds the match count.
+        
+        Args:
+            input_data: Decoded input template
+            candidates: List of (studentId, decoded template, template) tuples
+            
+        Returns:
+            Array of upper bounds, in candidate order
+        """
+        if not candidates:
+            return np.empty(0)
+        
+        counts = np.array([len(data['points']) for _, data, _ in candidates])
+        points = np.zeros((len(candidates), counts.max(), 2), np.float32)
+        orientations = np.zeros((len(candidates), counts.max()), np.float64)
+        for e, (_, data, _) in enumerate(candidates):
+            points[e, :counts[e]] = data['points']
+            orientations[e, :counts[e]] = data['orientations']
+        present = np.arange(counts.max()) < counts[:, None]
+        
+        # (candidate, stored minutia, input minutia) pairs inside both tolerances;
+        # the slack only loosens the bound against rounding at the tolerance edges
+        diff = points[:, :, None, :] - input_data['points'][None, None, :, :]
+        squared_distances = np.einsum('esqk,esqk->esq', diff, diff)
+        orientation_diffs = np.abs(self._normalize_angle(orientations[:, :, None] - input_data['orientations'][None, None, :]))
+        valid = ((squared_distances <= self._max_distance_sq + BOUND_SLACK) &
+                 (orientation_diffs <= self.orientation_tolerance + BOUND_SLACK) &
+                 present[:, :, None])
+        
+        max_matches = np.minimum(valid.any(axis=2).sum(axis=1), valid.any(axis=1).sum(axis=1))
+        return self._confidence_upper_bound(len(input_data['points']), counts, max_matches)
+    
+    def _confidence_upper_bound(self, count1, count2, max_matches) -> np.ndarray:
+        """
+        Highest confidence _calculate_match_confidence can return for at most max_matches matches
+        
+        Assumes every possible match has perfect distance and orientation
+        scores. Accepts scalars or arrays.
+        """
+        max_matches = np.asarray(max_matches)
+        confidence = 0.4 * max_matches / np.maximum(np.maximum(count1, count2), 1) + 0.6
+        confidence += np.where(max_matches >= 15, 0.1, np.where(max_matches >= 10, 0.05, 0.0))
+        return np.where(max_matches > 0, np.minimum(confidence, 1.0), 0.0)
+    
+    def _calculate_match_confidence(self, template1: Mapping[str, Any], template2: Mapping[str, Any]) -> float:
+        """
+        Calculate confidence score between two decoded templates
+        
+        Coordinate and orientation arrays are precomputed (and cached) at
+        decode time; see _calculate_match_confidence_arrays.
+        """
+        return self._calculate_match_confidence_arrays(
+            template1['points'], template1['orientations'],
+            template2['points'], template2['orientations'],
+            template1.get('tree'), template2.get('tree')
+        )
+    
+    def _calculate_match_confidence_arrays(self, points1: np.ndarray, orientations1: np.ndarray,
+                                           points2: np.ndarray, orientations2: np.ndarray,
+                                           tree1=None, tree2=None) -> float:
         """
         Calculate confidence score between two sets of minutiae
         
@@ -93,18 +397,12 @@ class FingerprintMatcher:
         3. Overall distribution patterns
         """
         try:
-            if not minutiae1 or not minutiae2:
+            if len(points1) == 0 or len(points2) == 0:
                 return 0.0
             
-            # Convert minutiae to numpy arrays for easier computation
-            points1 = np.array([[m['x'], m['y']] for m in minutiae1])
-            points2 = np.array([[m['x'], m['y']] for m in minutiae2])
-            orientations1 = np.array([m.get('orientation', 0) for m in minutiae1])
-            orientations2 = np.array([m.get('orientation', 0) for m in minutiae2])
-            
             # Find correspondences between minutiae points
             matches = self._find_minutiae_correspondences(
-                points1, points2, orientations1, orientations2
+                points1, points2, orientations1, orientations2, tree1, tree2
             )
             
             if len(matches) == 0:
@@ -116,29 +414,18 @@ class FingerprintMatcher:
             # 3. Relative coverage of fingerprint area
             
             match_count = len(matches)
-            total_minutiae = max(len(minutiae1), len(minutiae2))
+            total_minutiae = max(len(points1), len(points2))
             
             # Match ratio score
             match_ratio = match_count / total_minutiae
             
-            # Average match quality score
-            total_distance_score = 0.0
-            total_orientation_score = 0.0
-            
-            for match in matches:
-                i, j, distance, orientation_diff = match
-                
-                # Distance score (closer is better)
-                distance_score = max(0, 1 - (distance / self.max_distance_threshold))
-                
-                # Orientation score (similar orientation is better)
-                orientation_score = max(0, 1 - (abs(orientation_diff) / self.orientation_tolerance))
-                
-                total_distance_score += distance_score
-                total_orientation_score += orientation_score
+            # Average match quality score:
+            # distance score (closer is better) and orientation score (similar orientation is better)
+            distance_scores = np.maximum(0, 1 - matches[:, 2] * self._inv_max_distance)
+            orientation_scores = np.maximum(0, 1 - np.abs(matches[:, 3]) * self._inv_orientation_tolerance)
             
-            avg_distance_score = total_distance_score / match_count
-            avg_orientation_score = total_orientation_score / match_count
+            avg_distance_score = distance_scores.mean()
+            avg_orientation_score = orientation_scores.mean()
             
             # Calculate overall confidence
             # Weighted combination of different factors
@@ -154,78 +441,109 @@ class FingerprintMatcher:
             elif match_count >= 10:
                 confidence += 0.05
             
-            return min(confidence, 1.0)  # Cap at 1.0
+            return float(min(confidence, 1.0))  # Cap at 1.0
             
         except Exception as e:
             logger.error(f"Error calculating match confidence: {str(e)}")
             return 0.0
     
     def _find_minutiae_correspondences(self, points1: np.ndarray, points2: np.ndarray, 
-                                     orientations1: np.ndarray, orientations2: np.ndarray) -> List[tuple]:
+                                     orientations1: np.ndarray, orientations2: np.ndarray,
+                                     tree1=None, tree2=None) -> np.ndarray:
         """
         Find corresponding minutiae points between two fingerprint templates
         
-        Returns list of tuples: (index1, index2, distance, orientation_difference)
+        Given the templates' KD-trees (scipy installed), candidate pairs are
+        looked up within max_distance_threshold and matched by optimal
+        assignment. Otherwise a greedy assignment is made in input order,
+        with the compiled kernel when Numba is available or a vectorized
+        NumPy search.
+        
+        Returns (K, 4) array of rows: (index1, index2, distance, orientation_difference)
         """
-        matches = []
-        used_indices2 = set()
+        if tree1 is not None and tree2 is not None and linear_sum_assignment is not None:
+            return self._find_correspondences_kdtree(orientations1, orientations2, tree1, tree2)
         
-        for i, (point1, orientation1) in enumerate(zip(points1, orientations1)):
-            best_match = None
-            best_score = float('inf')
-            
-            for j, (point2, orientation2) in enumerate(zip(points2, orientations2)):
-                if j in used_indices2:
-                    continue
-                
-                # Calculate Euclidean distance
-                distance = np.linalg.norm(point1 - point2)
-                
-                # Skip if distance is too large
-                if distance > self.max_distance_threshold:
-                    continue
-                
-                # Calculate orientation difference
-                orientation_diff = abs(self._normalize_angle(orientation1 - orientation2))
-                
-                # Skip if orientation difference is too large
-                if orientation_diff > self.orientation_tolerance:
-                    continue
-                
-                # Calculate combined score (lower is better)
-                combined_score = distance + (orientation_diff * 20)  # Weight orientation difference
-                
-                if combined_score < best_score:
-                    best_score = combined_score
-                    best_match = (i, j, distance, orientation_diff)
+        if NUMBA_AVAILABLE:
+            return _nb_find_correspondences(
+                np.ascontiguousarray(points1, dtype=np.float32),
+                np.ascontiguousarray(points2, dtype=np.float32),
+                np.ascontiguousarray(orientations1, dtype=np.float32),
+                np.ascontiguousarray(orientations2, dtype=np.float32),
+                float(self.max_distance_threshold),
+                float(self.orientation_tolerance)
+            )
+        
+        # Pairwise squared distances (einsum avoids materialising the squared differences)
+        diff = points1[:, None, :] - points2[None, :, :]
+        squared_distances = np.einsum('ijk,ijk->ij', diff, diff)
+        
+        # Pairwise orientation differences, wrapped to [0, π]
+        orientation_diffs = np.abs(self._normalize_angle(orientations1[:, None] - orientations2[None, :]))
+        
+        # Pairs outside the distance or orientation tolerance can never match;
+        # only the remaining pairs need an actual distance
+        valid = (squared_distances <= self._max_distance_sq) & (orientation_diffs <= self.orientation_tolerance)
+        distances = np.zeros_like(squared_distances)
+        distances[valid] = np.sqrt(squared_distances[valid])
+        
+        # Combined score (lower is better), weighting orientation difference
+        scores = np.where(valid, distances + orientation_diffs * 20, np.inf)
+        
+        # Greedy one-to-one assignment in input order
+        matches = []
+        for i in range(len(points1)):
+            j = int(np.argmin(scores[i]))
+            if scores[i, j] == np.inf:
+                continue
             
-            if best_match:
-                matches.append(best_match)
-                used_indices2.add(best_match[1])
+            matches.append((i, j, distances[i, j], orientation_diffs[i, j]))
+            scores[:, j] = np.inf
+        
+        return np.array(matches, dtype=np.float64).reshape(-1, 4)
+    
+    def _find_correspondences_kdtree(self, orientations1: np.ndarray, orientations2: np.ndarray,
+                                     tree1, tree2) -> np.ndarray:
+        """
+        Optimal one-to-one correspondences among the pairs within the distance radius
+        
+        Pairs outside the distance or orientation tolerance cost more than
+        any set of valid pairs, so the assignment first maximises the number
+        of matches and then minimises their total combined score.
+        """
+        pairs = tree1.sparse_distance_matrix(tree2, self.max_distance_threshold, output_type='ndarray')
+        orientation_diffs = np.abs(self._normalize_angle(orientations1[pairs['i']] - orientations2[pairs['j']]))
+        
+        valid = orientation_diffs <= self.orientation_tolerance
+        if not valid.any():
+            return np.empty((0, 4))
+        
+        first, second = pairs['i'][valid], pairs['j'][valid]
+        distances, orientation_diffs = pairs['v'][valid], orientation_diffs[valid]
+        
+        costs = np.full((tree1.n, tree2.n), UNMATCHED_COST)
+        costs[first, second] = distances + orientation_diffs * 20
+        rows, cols = linear_sum_assignment(costs)
+        matched = costs[rows, cols] < UNMATCHED_COST
+        rows, cols = rows[matched], cols[matched]
         
-        return matches
+        # Look up each assigned pair's distance and orientation difference
+        pair_index = np.full((tree1.n, tree2.n), -1, dtype=np.intp)
+        pair_index[first, second] = np.arange(len(first))
+        selected = pair_index[rows, cols]
+        return np.column_stack([rows, cols, distances[selected], orientation_diffs[selected]]).astype(np.float64)
     
-    def _normalize_angle(self, angle: float) -> float:
+    def _normalize_angle(self, angle):
         """
-        Normalize angle to [-π, π] range
+        Normalize angle (scalar or array) to [-π, π) range
         """
-        while angle > np.pi:
-            angle -= 2 * np.pi
-        while angle < -np.pi:
-            angle += 2 * np.pi
-        return angle
+        return (angle + np.pi) % (2 * np.pi) - np.pi
     
-    def _decode_template(self, template: str) -> Optional[Dict[str, Any]]:
+    def _decode_template(self, template: str) -> Optional[Mapping[str, Any]]:
         """
-        Decode a fingerprint template from base64 encoded JSON
+        Decode a fingerprint template into its header fields and minutiae array
         """
-        try:
-            template_json = base64.b64decode(template).decode()
-            template_data = json.loads(template_json)
-            return template_data
-        except Exception as e:
-            logger.error(f"Error decoding template: {str(e)}")
-            return None
+        return decode_template(template)
     
     def verify_match(self, template1: str, template2: str) -> Dict[str, Any]:
         """
@@ -251,10 +569,10 @@ class FingerprintMatcher:
                     'error': 'Failed to decode templates'
                 }
             
-            minutiae1 = data1.get('minutiae', [])
-            minutiae2 = data2.get('minutiae', [])
+            minutiae1 = data1['minutiae']
+            minutiae2 = data2['minutiae']
             
-            if not minutiae1 or not minutiae2:
+            if len(minutiae1) == 0 or len(minutiae2) == 0:
                 return {
                     'success': False,
                     'match': False,
@@ -263,7 +581,7 @@ class FingerprintMatcher:
                 }
             
             # Calculate match confidence
-            confidence = self._calculate_match_confidence(minutiae1, minutiae2)
+            confidence = self._calculate_match_confidence(data1, data2)
             is_match = confidence >= self.match_threshold
             
             return {
@@ -286,9 +604,18 @@ class FingerprintMatcher:
         """
         Get similarity score between two templates (0.0 to 1.0)
         """
-        try:
-            result = self.verify_match(template1, template2)
-            return result.get('confidence', 0.0)
-        except Exception as e:
-            logger.error(f"Error getting similarity score: {str(e)}")
+        return self._confidence(template1, template2)
+    
+    def _confidence(self, template1: str, template2: str) -> float:
+        """
+        Match confidence between two template strings, 0.0 if either is unusable
+        
+        Decodes through the template cache and skips building a result dict.
+        """
+        data1 = self._decode_template(template1)
+        data2 = self._decode_template(template2)
+        
+        if not data1 or not data2 or len(data1['points']) == 0 or len(data2['points']) == 0:
             return 0.0
+        
+        return self._calculate_match_confidence(data1, data2)
@@ -0,0 +1,64 @@
+import unittest
+
+import cv2
+import numpy as np
+
+import services.fingerprint_processor as fingerprint_processor
+from services.fingerprint_processor import FingerprintProcessor
+
+
+def reference_quality(image: np.ndarray, minutiae_count: int) -> float:
+    """Quality score as computed before the fused statistics kernel (np.std, cv2.Laplacian, cv2.Canny)"""
+    factors = [
+        min(minutiae_count / 30.0, 1.0),
+        np.std(image) / 255.0,
+        min(cv2.Laplacian(image, cv2.CV_64F).var() / 1000.0, 1.0),
+        np.sum(cv2.Canny(image, 50, 150) > 0) / image.size
+    ]
+    quality = sum(factor * weight for factor, weight in zip(factors, [0.3, 0.25, 0.25, 0.2]))
+    return min(max(quality, 0.0), 1.0)
+
+
+def synthetic_print(rng: np.random.Generator, size: int = 256) -> np.ndarray:
+    """Concentric ridge pattern blended with noise, like the simulated scanner capture"""
+    ys, xs = np.mgrid[0:size, 0:size]
+    distance = np.sqrt((xs - size // 2) ** 2 + (ys - size // 2) ** 2 * rng.uniform(1.0, 2.0))
+    ridge = 128 + rng.uniform(20, 90) * np.sin(distance * rng.uniform(0.15, 0.6))
+    noise = np.clip(rng.normal(128, rng.uniform(5, 60), (size, size)), 0, 255)
+    blend = rng.uniform(0.3, 0.9)
+    image = (blend * ridge + (1 - blend) * noise).astype(np.uint8)
+    return cv2.GaussianBlur(image, (3, 3), 0)
+
+
+class QualityCalibrationTest(unittest.TestCase):
+    """The quality score must stay on the scale MIN_QUALITY_THRESHOLD was tuned for"""
+
+    def setUp(self):
+        self.processor = FingerprintProcessor()
+        rng = np.random.default_rng(0)
+        self.images = [
+            self.processor._enhance_fingerprint(synthetic_print(rng, int(rng.choice([200, 256, 320]))))
+            for _ in range(12)
+        ]
+
+    def assert_matches_reference(self):
+        for index, image in enumerate(self.images):
+            minutiae = [{}] * (5 + 3 * index)
+            with self.subTest(image=index):
+                self.assertAlmostEqual(self.processor._calculate_quality(image, minutiae),
+                                       reference_quality(image, len(minutiae)), places=5)
+
+    def test_quality_matches_canny_reference(self):
+        self.assert_matches_reference()
+
+    def test_fallback_quality_matches_canny_reference(self):
+        numba_available = fingerprint_processor.NUMBA_AVAILABLE
+        fingerprint_processor.NUMBA_AVAILABLE = False
+        try:
+            self.assert_matches_reference()
+        finally:
+            fingerprint_processor.NUMBA_AVAILABLE = numba_available
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,6 +6,7 @@ import base64
 from typing import Dict, Any, Optional
 import cv2
 import numpy as np
+from config.config import SIMULATED_CAPTURE_DELAY
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +22,7 @@ class DigitalPersonaInterface:
         self.is_initialized = False
         self.scanner_available = False
         self.capture_timeout = 30  # seconds
+        self.simulated_capture_delay = SIMULATED_CAPTURE_DELAY  # seconds
         
         # DigitalPersona SDK paths (typical installation)
         self.sdk_paths = [
@@ -186,28 +188,29 @@ class DigitalPersonaInterface:
             
             # Add ridge-like patterns
             center_x, center_y = width // 2, height // 2
-            for y in range(height):
-                for x in range(width):
-                    # Create concentric oval patterns
-                    dx = x - center_x
-                    dy = y - center_y
-                    distance = np.sqrt(dx*dx + dy*dy*1.5)
-                    
-                    # Create ridge pattern
-                    ridge_value = int(128 + 60 * np.sin(distance * 0.3))
-                    
-                    # Blend with noise
-                    image[y, x] = int(0.7 * ridge_value + 0.3 * image[y, x])
+            ys, xs = np.mgrid[0:height, 0:width]
+            
+            # Create concentric oval patterns
+            dx = xs - center_x
+            dy = ys - center_y
+            distance = np.sqrt(dx*dx + dy*dy*1.5)
+            
+            # Create ridge pattern
+            ridge = (128 + 60 * np.sin(distance * 0.3)).astype(np.int32)
+            
+            # Blend with noise
+            image = (0.7 * ridge + 0.3 * image).astype(np.uint8)
             
             # Apply some blur to make it more realistic
             image = cv2.GaussianBlur(image, (3, 3), 0)
             
-            # Encode as base64
-            _, buffer = cv2.imencode('.png', image)
+            # Encode as base64 (fastest zlib level; PNG stays lossless)
+            _, buffer = cv2.imencode('.png', image, [cv2.IMWRITE_PNG_COMPRESSION, 1])
             image_base64 = base64.b64encode(buffer).decode()
             
             # Simulate capture delay
-            time.sleep(2)
+            if self.simulated_capture_delay > 0:
+                time.sleep(self.simulated_capture_delay)
             
             return image_base64
             
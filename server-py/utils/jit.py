@@ -0,0 +1,23 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    
+    def njit(*args, **kwargs):
+        """
+        No-op stand-in for numba.njit when numba is not installed
+        
+        Supports both the bare ``@njit`` and the ``@njit(...)`` forms so
+        kernels can be declared unconditionally. Callers should check
+        NUMBA_AVAILABLE and prefer their OpenCV/NumPy path when it is False.
+        """
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+    
+    logger.warning("Numba not available - falling back to OpenCV/NumPy implementations")
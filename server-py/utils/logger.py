@@ -1,52 +1,316 @@
 import logging
 import sys
 import os
-from datetime import datetime
+import atexit
+import contextlib
+import copy
+import functools
+import itertools
+import locale
+import queue
+import threading
+import time
 from typing import Optional, Dict, Any
-from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
+from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler, QueueHandler, QueueListener
 
-class ColoredFormatter(logging.Formatter):
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Level numbers by name, for resolving configured level strings without dynamic lookups
+_LEVELS = {
+    'DEBUG': logging.DEBUG,
+    'INFO': logging.INFO,
+    'WARN': logging.WARNING,
+    'WARNING': logging.WARNING,
+    'ERROR': logging.ERROR,
+    'FATAL': logging.CRITICAL,
+    'CRITICAL': logging.CRITICAL
+}
+
+# Background listeners that write each logger's file handlers, keyed by logger name
+_listeners: Dict[str, QueueListener] = {}
+
+# (epoch second, ISO 8601 text) of the last structured event timestamp
+_iso_cache = (None, '')
+
+def _fast_iso() -> str:
+    """Current UTC time as ISO 8601 with microseconds, formatting the date part once per second"""
+    global _iso_cache
+    ns = time.time_ns()
+    second = ns // 1_000_000_000
+    cached = _iso_cache
+    if cached[0] != second:
+        cached = (second, time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(second)))
+        _iso_cache = cached
+    return f"{cached[1]}.{(ns // 1000) % 1_000_000:06d}Z"
+
+class _LazyKV:
+    """
+    Renders keyword arguments as 'k=v, ...' only when a handler formats the record
+    
+    With n set, only the first n items are rendered, so keys appended to
+    the same dict afterwards (record attributes) stay out of the text.
+    """
+    
+    __slots__ = ('d', 'n')
+    
+    def __init__(self, d: Dict[str, Any], n: Optional[int] = None):
+        self.d = d
+        self.n = n
+    
+    def __str__(self):
+        return ', '.join([f"{k}={v}" for k, v in itertools.islice(self.d.items(), self.n)])
+
+class FastFormatter(logging.Formatter):
+    """
+    Formatter that renders the default asctime once per second
+    
+    Output is identical to logging.Formatter; the strftime result for the
+    current second is cached and only the milliseconds are formatted per
+    record. Custom datefmt values go through the standard path.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._second_cache = (None, '')
+    
+    def formatTime(self, record, datefmt=None):
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        
+        second = int(record.created)
+        cached = self._second_cache
+        if cached[0] != second:
+            cached = (second, time.strftime(self.default_time_format, self.converter(second)))
+            self._second_cache = cached
+        return self.default_msec_format % (cached[1], record.msecs)
+
+class _JSONLine(bytes):
+    """
+    Pre-serialized JSON event message
+    
+    The JSON-aware formatters and file handlers use the bytes directly;
+    any other handler (e.g. the root handler the record propagates to)
+    renders it through getMessage() as the decoded JSON text.
+    """
+    
+    __slots__ = ()
+    
+    def __str__(self):
+        return self.decode()
+
+class APIReq:
+    """
+    Fields of one API request log record, serialized by JSONFormatter
+    
+    Also passed as the message argument, so other formatters render the
+    fields as 'k=v, ...' in the same order as the plain-text event details.
+    """
+    
+    __slots__ = ('method', 'endpoint', 'status', 'duration_ms', 'extra')
+    
+    def __init__(self, method: str, endpoint: str, status: int, duration_ms: float, extra: Dict[str, Any]):
+        self.method = method
+        self.endpoint = endpoint
+        self.status = status
+        self.duration_ms = duration_ms
+        self.extra = extra
+    
+    def __str__(self):
+        extra = f"{_LazyKV(self.extra)}, " if self.extra else ''
+        return (f"{extra}request_type=api, method={self.method}, endpoint={self.endpoint}, "
+                f"status_code={self.status}, duration_ms={self.duration_ms}")
+
+class JSONFormatter(FastFormatter):
+    """
+    Formatter for structured records
+    
+    Pre-serialized JSON (bytes) messages are written as-is, and records
+    carrying an APIReq are serialized straight from its slots; all other
+    records are formatted normally.
+    """
+    
+    def format(self, record):
+        if isinstance(record.msg, (bytes, bytearray)):
+            return record.msg.decode()
+        
+        api = record.__dict__.get('api')
+        if api is not None and orjson is not None:
+            return orjson.dumps({
+                'event': 'api_request',
+                'level': logging.getLevelName(record.levelno),
+                'ts': int(record.created * 1e9),
+                'request_type': 'api',
+                'method': api.method,
+                'endpoint': api.endpoint,
+                'status_code': api.status,
+                'duration_ms': api.duration_ms,
+                **api.extra
+            }, default=str, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+        
+        return super().format(record)
+
+class _QueueHandler(QueueHandler):
+    """QueueHandler that keeps pre-serialized JSON messages as bytes for the listener's formatters"""
+    
+    def prepare(self, record):
+        if isinstance(record.msg, (bytes, bytearray)):
+            record = copy.copy(record)
+            record.args = None
+            record.exc_info = None
+            record.exc_text = None
+            return record
+        return super().prepare(record)
+
+class ColoredFormatter(JSONFormatter):
     """Custom formatter to add colors to log levels"""
     
     # ANSI color codes
     COLORS = {
-        'DEBUG': '\033[36m',      # Cyan
-        'INFO': '\033[32m',       # Green
-        'WARNING': '\033[33m',    # Yellow
-        'ERROR': '\033[31m',      # Red
-        'CRITICAL': '\033[35m',   # Magenta
-        'RESET': '\033[0m'        # Reset
+        logging.DEBUG: '\033[36m',      # Cyan
+        logging.INFO: '\033[32m',       # Green
+        logging.WARNING: '\033[33m',    # Yellow
+        logging.ERROR: '\033[31m',      # Red
+        logging.CRITICAL: '\033[35m',   # Magenta
     }
+    RESET = '\033[0m'
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Colored level names, built once
+        self._colored = {
+            levelno: f"{color}{logging.getLevelName(levelno)}{self.RESET}"
+            for levelno, color in self.COLORS.items()
+        }
     
     def format(self, record):
-        # Add color to levelname
-        if record.levelname in self.COLORS:
-            record.levelname = f"{self.COLORS[record.levelname]}{record.levelname}{self.COLORS['RESET']}"
+        # Color the level name for this output only; the record is shared with other handlers
+        levelname = record.levelname
+        record.levelname = self._colored.get(record.levelno, levelname)
+        try:
+            return super().format(record)
+        finally:
+            record.levelname = levelname
+
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that batches writes in a large binary stream buffer
+    
+    Records are written without a flush per record; a background thread
+    flushes the buffer every flush_interval seconds, and closing or rolling
+    over flushes it as well. Pre-serialized JSON (bytes) messages are
+    written straight to the stream, bypassing the formatter and the str
+    round trip; other records are formatted and encoded once, with the
+    bytes memoized on the record for any other handler sharing the
+    formatter. Rollover is decided from a running byte count, since asking
+    the stream for its position would flush on every record.
+    """
+    
+    def __init__(self, *args, buffer_size: int = 64 * 1024, flush_interval: float = 0.2, **kwargs):
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self._size = 0
+        super().__init__(*args, **kwargs)
         
-        return super().format(record)
+        # Outside UTF-8 mode the base class leaves encoding as None or 'locale',
+        # neither of which str.encode accepts; resolve it once for _record_bytes
+        if self.encoding is None or self.encoding == 'locale':
+            self.encoding = locale.getpreferredencoding(False)
+        
+        self._flush_stop = threading.Event()
+        self._flush_thread = threading.Thread(target=self._flush_periodically, name='log-flush', daemon=True)
+        self._flush_thread.start()
+    
+    def _open(self):
+        mode = self.mode if 'b' in self.mode else f'{self.mode}b'
+        stream = open(self.baseFilename, mode, buffering=self.buffer_size)
+        self._size = stream.tell()
+        return stream
+    
+    def _record_bytes(self, record) -> bytes:
+        msg = record.msg
+        if isinstance(msg, (bytes, bytearray)):
+            return bytes(msg) + b'\n'
+        
+        cached = record.__dict__.get('_encoded')
+        if cached is not None and cached[0] is self.formatter:
+            return cached[1]
+        
+        data = f"{self.format(record)}{self.terminator}".encode(self.encoding, self.errors or 'strict')
+        record._encoded = (self.formatter, data)
+        return data
+    
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            
+            data = self._record_bytes(record)
+            if self.maxBytes > 0 and self._size + len(data) >= self.maxBytes:
+                self.doRollover()
+            
+            self.stream.write(data)
+            self._size += len(data)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+    
+    def flush(self):
+        """Leave records in the buffer; the flush thread writes them out"""
+    
+    def _flush_buffer(self) -> None:
+        self.acquire()
+        try:
+            if self.stream and not self.stream.closed:
+                self.stream.flush()
+        finally:
+            self.release()
+    
+    def _flush_periodically(self) -> None:
+        while not self._flush_stop.wait(self.flush_interval):
+            self._flush_buffer()
+    
+    def close(self):
+        self._flush_stop.set()
+        self._flush_buffer()
+        super().close()
 
 class PerformanceLogger:
     """Logger for performance metrics"""
     
     def __init__(self, logger: logging.Logger):
         self.logger = logger
-        self._start_times: Dict[str, float] = {}
+        self._start_times: Dict[str, int] = {}
+        self._perf = time.perf_counter_ns
+    
+    @contextlib.contextmanager
+    def timed(self, operation: str, **kwargs):
+        """Time the enclosed block and log its duration (thread-safe, no shared state)"""
+        start_time = self._perf()
+        try:
+            yield
+        finally:
+            if self.logger.isEnabledFor(logging.INFO):
+                duration = (self._perf() - start_time) * 1e-9
+                self.logger.info("Performance: %s completed in %.3fs", operation, duration, extra=kwargs)
     
     def start_timer(self, operation: str) -> None:
-        """Start timing an operation"""
-        import time
-        self._start_times[operation] = time.time()
+        """Start timing an operation (deprecated: use timed)"""
+        self._start_times[operation] = self._perf()
     
     def end_timer(self, operation: str, **kwargs) -> float:
-        """End timing an operation and log the duration"""
-        import time
+        """End timing an operation and log the duration (deprecated: use timed)"""
         start_time = self._start_times.pop(operation, None)
         if start_time is None:
-            self.logger.warning(f"No start time found for operation: {operation}")
+            self.logger.warning("No start time found for operation: %s", operation)
             return 0.0
         
-        duration = time.time() - start_time
-        self.logger.info(f"Performance: {operation} completed in {duration:.3f}s", extra=kwargs)
+        duration = (self._perf() - start_time) * 1e-9
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("Performance: %s completed in %.3fs", operation, duration, extra=kwargs)
         return duration
 
 def setup_logger(
@@ -77,23 +341,28 @@ def setup_logger(
     """
     # Create logger
     logger = logging.getLogger(name)
-    logger.setLevel(getattr(logging, level.upper(), logging.INFO))
+    levelno = _LEVELS.get(level.upper(), logging.INFO)
+    logger.setLevel(levelno)
     
     # Clear existing handlers
     logger.handlers.clear()
+    _stop_listener(name)
     
     # Default format
     if log_format is None:
         log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     
+    # One formatter shared by the plain console and both file handlers (and other loggers)
+    plain_formatter = _shared_formatter(JSONFormatter, log_format)
+    
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(getattr(logging, level.upper(), logging.INFO))
+    console_handler.setLevel(levelno)
     
     if enable_colors and hasattr(sys.stdout, 'isatty') and sys.stdout.isatty():
-        console_formatter = ColoredFormatter(log_format)
+        console_formatter = _shared_formatter(ColoredFormatter, log_format)
     else:
-        console_formatter = logging.Formatter(log_format)
+        console_formatter = plain_formatter
     
     console_handler.setFormatter(console_formatter)
     logger.addHandler(console_handler)
@@ -101,47 +370,78 @@ def setup_logger(
     # File handler
     if log_to_file:
         # Create log directory if it doesn't exist
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
+        os.makedirs(log_dir, exist_ok=True)
         
         # Main log file
         log_file = os.path.join(log_dir, f'{name}.log')
-        file_handler = RotatingFileHandler(
+        file_handler = BufferedRotatingFileHandler(
             log_file,
             maxBytes=max_file_size,
             backupCount=backup_count
         )
-        file_handler.setLevel(getattr(logging, level.upper(), logging.INFO))
-        file_formatter = logging.Formatter(log_format)
-        file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
+        file_handler.setLevel(levelno)
+        file_handler.setFormatter(plain_formatter)
         
         # Error log file (only errors and above)
         error_log_file = os.path.join(log_dir, f'{name}_error.log')
-        error_handler = RotatingFileHandler(
+        error_handler = BufferedRotatingFileHandler(
             error_log_file,
             maxBytes=max_file_size,
             backupCount=backup_count
         )
         error_handler.setLevel(logging.ERROR)
-        error_handler.setFormatter(file_formatter)
-        logger.addHandler(error_handler)
+        error_handler.setFormatter(plain_formatter)
+        
+        # File writes happen on the listener thread; callers only enqueue records
+        log_queue = queue.Queue(-1)
+        listener = QueueListener(log_queue, file_handler, error_handler, respect_handler_level=True)
+        listener.start()
+        _listeners[name] = listener
+        logger.addHandler(_QueueHandler(log_queue))
     
     return logger
 
+@functools.lru_cache(maxsize=32)
+def _shared_formatter(formatter_class, log_format: str) -> logging.Formatter:
+    """One formatter instance per class and format string, reused by every logger set up with them"""
+    return formatter_class(log_format)
+
+def _stop_listener(name: str) -> None:
+    """Stop the file listener of a logger, writing out its queued records and closing its handlers"""
+    listener = _listeners.pop(name, None)
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+def shutdown_logging() -> None:
+    """Stop all file listeners, writing out queued records (registered with atexit)"""
+    for name in list(_listeners):
+        _stop_listener(name)
+
+atexit.register(shutdown_logging)
+
 def log_function_call(logger: logging.Logger):
     """Decorator to log function calls"""
     def decorator(func):
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
+            # Nothing this wrapper logs would be emitted
+            if not logger.isEnabledFor(logging.ERROR):
+                return func(*args, **kwargs)
+            
             func_name = func.__name__
-            logger.debug(f"Calling function: {func_name}")
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                logger.debug("Calling function: %s", func_name)
             
             try:
                 result = func(*args, **kwargs)
-                logger.debug(f"Function {func_name} completed successfully")
+                if debug:
+                    logger.debug("Function %s completed successfully", func_name)
                 return result
             except Exception as e:
-                logger.error(f"Function {func_name} failed with error: {str(e)}")
+                logger.error("Function %s failed with error: %s", func_name, e)
                 raise
         
         return wrapper
@@ -149,20 +449,27 @@ def log_function_call(logger: logging.Logger):
 
 def log_performance(logger: logging.Logger):
     """Decorator to log function performance"""
+    perf = time.perf_counter_ns  # Closure variable: no global or attribute lookup per call
+    
     def decorator(func):
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            import time
+            # Nothing this wrapper logs would be emitted, so skip the timing
+            if not logger.isEnabledFor(logging.ERROR):
+                return func(*args, **kwargs)
+            
             func_name = func.__name__
-            start_time = time.time()
+            start_time = perf()
             
             try:
                 result = func(*args, **kwargs)
-                duration = time.time() - start_time
-                logger.info(f"Performance: {func_name} completed in {duration:.3f}s")
+                if logger.isEnabledFor(logging.INFO):
+                    duration = (perf() - start_time) * 1e-9
+                    logger.info("Performance: %s completed in %.3fs", func_name, duration)
                 return result
             except Exception as e:
-                duration = time.time() - start_time
-                logger.error(f"Performance: {func_name} failed after {duration:.3f}s with error: {str(e)}")
+                duration = (perf() - start_time) * 1e-9
+                logger.error("Performance: %s failed after %.3fs with error: %s", func_name, duration, e)
                 raise
         
         return wrapper
@@ -174,20 +481,28 @@ class StructuredLogger:
     def __init__(self, logger: logging.Logger):
         self.logger = logger
     
-    def log_event(self, event: str, level: str = 'INFO', **kwargs):
-        """Log a structured event"""
-        log_data = {
-            'event': event,
-            'timestamp': datetime.utcnow().isoformat(),
-            **kwargs
-        }
+    def log_event(self, event: str, level=logging.INFO, **kwargs):
+        """Log a structured event, as one JSON line when orjson is available (level: name or number)"""
+        levelno = level if isinstance(level, int) else _LEVELS.get(level.upper(), logging.INFO)
+        if not self.logger.isEnabledFor(levelno):
+            return
+        
+        if orjson is not None:
+            payload = orjson.dumps({'event': event, 'level': logging.getLevelName(levelno), 'ts': time.time_ns(), **kwargs},
+                                   default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+            self.logger.log(levelno, _JSONLine(payload))
+            return
         
-        message = f"Event: {event}"
-        if kwargs:
-            details = ', '.join(f"{k}={v}" for k, v in kwargs.items())
-            message += f" | {details}"
+        # kwargs doubles as the record's extra attributes; the details string
+        # covers only the caller's fields and is built lazily
+        details = _LazyKV(kwargs, len(kwargs)) if kwargs else None
+        kwargs.setdefault('timestamp', _fast_iso())
+        kwargs['event'] = event
         
-        getattr(self.logger, level.lower())(message, extra=log_data)
+        if details is not None:
+            self.logger.log(levelno, "Event: %s | %s", event, details, extra=kwargs)
+        else:
+            self.logger.log(levelno, "Event: %s", event, extra=kwargs)
     
     def log_fingerprint_operation(self, operation: str, success: bool, **kwargs):
         """Log fingerprint-specific operations"""
@@ -197,7 +512,7 @@ class StructuredLogger:
             'success': success
         })
         
-        level = 'INFO' if success else 'WARNING'
+        level = logging.INFO if success else logging.WARNING
         self.log_event(f"fingerprint_{operation}", level, **kwargs)
     
     def log_scanner_event(self, event: str, scanner_id: str = None, **kwargs):
@@ -211,6 +526,16 @@ class StructuredLogger:
     
     def log_api_request(self, method: str, endpoint: str, status_code: int, duration: float, **kwargs):
         """Log API request details"""
+        level = logging.INFO if 200 <= status_code < 400 else logging.WARNING
+        if not self.logger.isEnabledFor(level):
+            return
+        
+        # With orjson, the formatter serializes the request from a slotted record
+        if orjson is not None:
+            api = APIReq(method, endpoint, status_code, round(duration * 1000, 2), kwargs)
+            self.logger.log(level, "Event: %s | %s", 'api_request', api, extra={'api': api})
+            return
+        
         kwargs.update({
             'request_type': 'api',
             'method': method,
@@ -219,7 +544,6 @@ class StructuredLogger:
             'duration_ms': round(duration * 1000, 2)
         })
         
-        level = 'INFO' if 200 <= status_code < 400 else 'WARNING'
         self.log_event('api_request', level, **kwargs)
 
 # Global logger instances
@@ -259,11 +583,16 @@ def initialize_logging(
     
     return main_logger
 
+@functools.lru_cache(maxsize=256)
+def _cached_get_logger(name: str) -> logging.Logger:
+    # Loggers are singletons per name, so repeated lookups can skip logging's module lock
+    return logging.getLogger(name)
+
 def get_logger(name: str = None) -> logging.Logger:
     """Get a logger instance"""
     if name is None:
         return main_logger or logging.getLogger()
-    return logging.getLogger(name)
+    return _cached_get_logger(name)
 
 def get_performance_logger() -> Optional[PerformanceLogger]:
     """Get the performance logger instance"""
@@ -276,32 +605,40 @@ def get_structured_logger() -> Optional[StructuredLogger]:
 # Utility functions for common logging patterns
 def log_error(logger: logging.Logger, error: Exception, context: str = None):
     """Log an error with context"""
-    error_msg = f"Error: {str(error)}"
-    if context:
-        error_msg = f"[{context}] {error_msg}"
+    if not logger.isEnabledFor(logging.ERROR):
+        return
     
-    logger.error(error_msg, exc_info=True)
+    if context:
+        logger.error("[%s] Error: %s", context, error, exc_info=True)
+    else:
+        logger.error("Error: %s", error, exc_info=True)
 
 def log_warning(logger: logging.Logger, message: str, **kwargs):
     """Log a warning with optional structured data"""
-    if kwargs:
-        details = ', '.join(f"{k}={v}" for k, v in kwargs.items())
-        message += f" | {details}"
+    if not logger.isEnabledFor(logging.WARNING):
+        return
     
-    logger.warning(message)
+    if kwargs:
+        logger.warning("%s | %s", message, _LazyKV(kwargs))
+    else:
+        logger.warning(message)
 
 def log_info(logger: logging.Logger, message: str, **kwargs):
     """Log info with optional structured data"""
-    if kwargs:
-        details = ', '.join(f"{k}={v}" for k, v in kwargs.items())
-        message += f" | {details}"
+    if not logger.isEnabledFor(logging.INFO):
+        return
     
-    logger.info(message)
+    if kwargs:
+        logger.info("%s | %s", message, _LazyKV(kwargs))
+    else:
+        logger.info(message)
 
 def log_debug(logger: logging.Logger, message: str, **kwargs):
     """Log debug info with optional structured data"""
-    if kwargs:
-        details = ', '.join(f"{k}={v}" for k, v in kwargs.items())
-        message += f" | {details}"
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
     
-    logger.debug(message)
+    if kwargs:
+        logger.debug("%s | %s", message, _LazyKV(kwargs))
+    else:
+        logger.debug(message)
@@ -0,0 +1,239 @@
+import base64
+import binascii
+import json
+import struct
+import logging
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional
+import numpy as np
+from config.config import TEMPLATE_VERSION as TEMPLATE_FORMAT_VERSION
+
+logger = logging.getLogger(__name__)
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Packed minutia record: position, quantized orientation and type
+MINUTIA_DTYPE = np.dtype([('x', '<i2'), ('y', '<i2'), ('o', 'u1'), ('t', 'u1')])
+
+# Orientations are stored as one byte: 256 steps over [-π, π) (~1.4° per step)
+ORIENTATION_STEPS = 256
+
+MINUTIA_TYPES = {'ending': 0, 'bifurcation': 1}
+
+# 32-byte header: magic, version, quality, height, width, minutiae count, padding, coarse hash
+TEMPLATE_MAGIC = b'FPT'
+TEMPLATE_VERSION = int(TEMPLATE_FORMAT_VERSION.split('.')[0])  # major version byte of the configured '2.0'
+HEADER_FORMAT = '<3sBfHHHxx16s'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# Coarse hash: occupancy of a 4x4 spatial grid x 8 orientation bins (128 bits)
+HASH_GRID = 4
+HASH_ORIENTATION_BINS = 8
+
+# Nearest neighbours per minutia in the rotation-invariant k-NN descriptor
+KNN_NEIGHBOURS = 8
+
+# Number of set bits for every byte value, for Hamming distances between hashes
+POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], np.uint8)
+
+# Number of decoded templates kept in memory (gallery templates repeat across /match calls)
+TEMPLATE_CACHE_SIZE = 4096
+
+def quantize_orientation(orientation) -> np.ndarray:
+    """
+    Quantize orientations in radians to uint8 steps (wrapping around the circle)
+    """
+    steps = np.rint((np.asarray(orientation, np.float64) + np.pi) * (ORIENTATION_STEPS / (2 * np.pi)))
+    return (steps.astype(np.int64) % ORIENTATION_STEPS).astype(np.uint8)
+
+def dequantize_orientation(quantized: np.ndarray) -> np.ndarray:
+    """
+    Convert quantized orientations back to radians in [-π, π)
+    """
+    return quantized.astype(np.float64) * (2 * np.pi / ORIENTATION_STEPS) - np.pi
+
+def pack_minutiae(minutiae: list) -> np.ndarray:
+    """
+    Convert a list of minutia dictionaries into a MINUTIA_DTYPE array
+    """
+    arr = np.empty(len(minutiae), MINUTIA_DTYPE)
+    arr['x'] = [m['x'] for m in minutiae]
+    arr['y'] = [m['y'] for m in minutiae]
+    arr['o'] = quantize_orientation([m.get('orientation', 0.0) for m in minutiae])
+    arr['t'] = [MINUTIA_TYPES.get(m.get('type'), 1) for m in minutiae]
+    return arr
+
+def coarse_hash(minutiae: np.ndarray, image_shape: tuple) -> np.ndarray:
+    """
+    Compute the 128-bit coarse hash of a minutiae array
+    
+    Bins minutiae by position on a 4x4 grid and by orientation into 8 bins,
+    then sets one bit per bin whose count is above the median. Similar prints
+    have a small Hamming distance, which makes it a cheap matching prefilter.
+    
+    Returns:
+        16-byte uint8 array
+    """
+    height, width = max(int(image_shape[0]), 1), max(int(image_shape[1]), 1)
+    cell_x = np.clip(minutiae['x'].astype(np.int64) * HASH_GRID // width, 0, HASH_GRID - 1)
+    cell_y = np.clip(minutiae['y'].astype(np.int64) * HASH_GRID // height, 0, HASH_GRID - 1)
+    orientation_bin = minutiae['o'].astype(np.int64) * HASH_ORIENTATION_BINS // ORIENTATION_STEPS
+    
+    bins = (cell_y * HASH_GRID + cell_x) * HASH_ORIENTATION_BINS + orientation_bin
+    histogram = np.bincount(bins, minlength=HASH_GRID * HASH_GRID * HASH_ORIENTATION_BINS)
+    return np.packbits(histogram > np.median(histogram))
+
+def hamming_distances(query_hash: np.ndarray, hashes: np.ndarray) -> np.ndarray:
+    """
+    Hamming distance between one coarse hash and each row of an (N, 16) hash array
+    """
+    return POPCOUNT_TABLE[np.bitwise_xor(hashes, query_hash)].sum(axis=1, dtype=np.int64)
+
+def _build_knn_descriptor(points: np.ndarray, orientations: np.ndarray, tree=None, k: int = KNN_NEIGHBOURS) -> np.ndarray:
+    """
+    Rotation-invariant descriptor of each minutia's k nearest neighbours
+    
+    For every reference minutia, stores (distance, orientation relative to
+    the reference) for its k nearest other minutiae, nearest first. Both
+    are unchanged by rotating the print. Rows with fewer than k neighbours
+    are padded with NaN.
+    
+    Returns:
+        (N, k, 2) float32 array
+    """
+    count = len(points)
+    descriptor = np.full((count, k, 2), np.nan, np.float32)
+    if count < 2:
+        return descriptor
+    
+    # k + 1 nearest, since every minutia is its own nearest neighbour
+    neighbours = min(k, count - 1)
+    if tree is not None:
+        nearest_distances, nearest = tree.query(points, k=neighbours + 1)
+        nearest_distances, nearest = nearest_distances[:, 1:], nearest[:, 1:]
+    else:
+        diff = points[None, :, :] - points[:, None, :]
+        distances = np.sqrt(np.einsum('rik,rik->ri', diff, diff))
+        np.fill_diagonal(distances, np.inf)
+        nearest = np.argsort(distances, axis=1, kind='stable')[:, :neighbours]
+        nearest_distances = np.take_along_axis(distances, nearest, axis=1)
+    
+    relative = orientations[nearest] - orientations[:, None]
+    descriptor[:, :neighbours, 0] = nearest_distances
+    descriptor[:, :neighbours, 1] = (relative + np.pi) % (2 * np.pi) - np.pi
+    return descriptor
+
+def encode_template(minutiae: list, quality: float, image_shape: tuple) -> str:
+    """
+    Encode minutiae into a base64 binary template
+    
+    Args:
+        minutiae: List of dictionaries with x, y, orientation and type
+        quality: Quality score of the source image
+        image_shape: (height, width) of the source image
+    
+    Returns:
+        Base64 encoded template string
+    """
+    arr = pack_minutiae(minutiae)
+    header = struct.pack(HEADER_FORMAT, TEMPLATE_MAGIC, TEMPLATE_VERSION, quality,
+                         image_shape[0], image_shape[1], len(arr),
+                         coarse_hash(arr, image_shape).tobytes())
+    return base64.b64encode(header + arr.tobytes()).decode()
+
+def decode_template(template: str) -> Optional[Mapping[str, Any]]:
+    """
+    Decode a base64 template into its header fields and minutiae array
+    
+    Templates created before the binary format (base64 encoded JSON) are
+    still accepted; their minutiae are converted to the same packed array.
+    Results are cached by template string, so the returned mapping and
+    its arrays are read-only.
+    
+    Returns:
+        Mapping with version, quality, image_shape, minutiae_count,
+        minutiae (structured array of MINUTIA_DTYPE), coarse_hash (16-byte
+        uint8 array), points ((N, 2) float32 x/y), orientations ((N,)
+        float32 radians), centroid (mean x/y) and tree (cKDTree over points,
+        None without scipy), or None if invalid
+    """
+    if not isinstance(template, (str, bytes)):
+        logger.error(f"Error decoding template: expected string, got {type(template).__name__}")
+        return None
+    return _decode_template_cached(template)
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _decode_template_cached(template: str) -> Optional[Mapping[str, Any]]:
+    try:
+        buf = binascii.a2b_base64(template)
+        
+        if buf[:len(TEMPLATE_MAGIC)] != TEMPLATE_MAGIC:
+            template_data = _decode_legacy_template(buf)
+        else:
+            _, version, quality, height, width, count, hash_bytes = struct.unpack_from(HEADER_FORMAT, buf)
+            template_data = {
+                'version': f'{version}.0',
+                'quality': float(quality),
+                'image_shape': (height, width),
+                'minutiae_count': count,
+                'minutiae': np.frombuffer(buf, MINUTIA_DTYPE, count=count, offset=HEADER_SIZE),
+                'coarse_hash': np.frombuffer(hash_bytes, np.uint8)
+            }
+        
+        # Coordinate and orientation arrays for matching, built once per template
+        # (float32 is exact for pixel coordinates and the 256-step orientations;
+        # legacy templates keep the float orientations they were stored with)
+        minutiae = template_data['minutiae']
+        template_data['points'] = np.stack([minutiae['x'], minutiae['y']], axis=1).astype(np.float32)
+        if 'orientations' not in template_data:
+            template_data['orientations'] = dequantize_orientation(minutiae['o']).astype(np.float32)
+        template_data['centroid'] = template_data['points'].mean(axis=0) if len(minutiae) else np.zeros(2)
+        template_data['tree'] = cKDTree(template_data['points']) if cKDTree is not None and len(minutiae) else None
+        
+        for key in ('minutiae', 'coarse_hash', 'points', 'orientations', 'centroid'):
+            template_data[key].flags.writeable = False
+        return MappingProxyType(template_data)
+    except Exception as e:
+        logger.error(f"Error decoding template: {str(e)}")
+        return None
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def knn_descriptor(template: str) -> Optional[np.ndarray]:
+    """
+    Read-only k-NN descriptor of a template, or None if it cannot be decoded
+    
+    Built on first use and cached separately from decode_template, since
+    only the /match prefilter reads it.
+    """
+    template_data = decode_template(template)
+    if template_data is None:
+        return None
+    
+    descriptor = _build_knn_descriptor(template_data['points'], template_data['orientations'], template_data['tree'])
+    descriptor.flags.writeable = False
+    return descriptor
+
+def _decode_legacy_template(buf: bytes) -> Dict[str, Any]:
+    """
+    Decode a version 1.0 base64 JSON template
+    """
+    # orjson parses the decoded bytes directly, without a str round trip
+    template_data = orjson.loads(buf) if orjson is not None else json.loads(buf.decode())
+    
+    minutiae = template_data.get('minutiae', [])
+    arr = pack_minutiae(minutiae)
+    template_data['minutiae'] = arr
+    # Quantizing would move orientations and wrap θ = π (common from atan2) to -π
+    template_data['orientations'] = np.array([m.get('orientation', 0.0) for m in minutiae], np.float32)
+    template_data['coarse_hash'] = coarse_hash(arr, template_data.get('image_shape', (1, 1)))
+    template_data['minutiae_count'] = template_data.get('minutiae_count', len(arr))
+    return template_data